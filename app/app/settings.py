@@ -93,6 +93,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Recipe list responses are only cached on a backend shared by every worker,
+# e.g. RECIPE_LIST_CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache.
+if os.environ.get('RECIPE_LIST_CACHE_BACKEND'):
+    CACHES['recipe_list'] = {
+        'BACKEND': os.environ['RECIPE_LIST_CACHE_BACKEND'],
+        'LOCATION': os.environ.get('RECIPE_LIST_CACHE_LOCATION', ''),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
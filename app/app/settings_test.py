@@ -0,0 +1,24 @@
+"""
+Django settings for running the test suite.
+
+Usage: python manage.py test --settings=app.settings_test --parallel --keepdb
+"""
+from app.settings import *  # noqa: F401,F403
+from app.settings import DATABASES
+
+# PBKDF2 is deliberately slow; tests only need passwords that round-trip.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# No test relies on serialized_rollback, so skip dumping the test database.
+# Commits need not wait for the WAL flush; a crash only loses throwaway rows.
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'OPTIONS': {
+            **DATABASES['default'].get('OPTIONS', {}),
+            'options': '-c synchronous_commit=off',
+        },
+        'TEST': {'SERIALIZE': False},
+    },
+}
@@ -8,6 +8,7 @@ from app import calc
 
 class CalcTests(SimpleTestCase):
     """Test the calc module."""
+    databases = set()
 
     def test_add_numbers(self):
         """Test adding two numbers together."""
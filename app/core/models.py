@@ -73,6 +73,9 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
 
+    class Meta:
+        indexes = [models.Index(fields=['user', '-id'], name='recipe_user_id_desc_idx')]
+
     def __str__(self):
         return self.title
 
@@ -85,6 +88,9 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [models.Index(fields=['user', '-name'], name='tag_user_name_desc_idx')]
+
     def __str__(self):
         return self.name
 
@@ -98,5 +104,8 @@ class Ingredient(models.Model):
     )
     amount = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['user', '-name'], name='ingredient_user_name_desc_idx')]
+
     def __str__(self):
         return self.name
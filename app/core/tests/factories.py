@@ -0,0 +1,9 @@
+"""
+Shared factories for creating test data.
+"""
+from django.contrib.auth import get_user_model
+
+
+def make_user(email='user@example.com', password='password123', **extra_fields):
+    """Create and return a user with sample credentials."""
+    return get_user_model().objects.create_user(email, password, **extra_fields)
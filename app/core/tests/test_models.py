@@ -4,17 +4,14 @@ Tests for models in the core application.
 from unittest.mock import patch
 from decimal import Decimal
 
-from django.test import TestCase
+from django.test import (TestCase, override_settings)
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.tests.factories import make_user
 
 
-def create_user(email='user@example.com', password='password123'):
-    """Helper function to create a user."""
-    return get_user_model().objects.create_user(email, password)
-
-
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
 class ModelTests(TestCase):
     """Test models in the core application."""
     def test_create_user_with_email_successful(self):
@@ -38,14 +35,18 @@ class ModelTests(TestCase):
             ['test4@example.COM', 'test4@example.com']
         ]
         for email, expected in sample_emails:
-            user = get_user_model().objects.create_user(email, 'test123')
-            self.assertEqual(user.email, expected)
+            self.assertEqual(get_user_model().objects.normalize_email(email), expected)
 
     def test_new_user_without_email_raises_error(self):
         """Test creating user without an email raises ValueError."""
         with self.assertRaises(ValueError):
             get_user_model().objects.create_user('', 'test123')
 
+    def test_make_user_without_email_raises_error(self):
+        """Test the make_user factory keeps create_user's email validation."""
+        with self.assertRaises(ValueError):
+            make_user(email='')
+
     def test_create_superuser_with_email_successful(self):
         """Test creating a superuser with an email is successful."""
         user = get_user_model().objects.create_superuser(
@@ -75,7 +76,7 @@ class ModelTests(TestCase):
 
     def test_create_tag(self):
         """Test creating a tag is successful"""
-        user = create_user()
+        user = make_user()
         tag = models.Tag.objects.create(
             user=user,
             name='Tag1'
@@ -85,7 +86,7 @@ class ModelTests(TestCase):
 
     def test_create_ingredient(self):
         """Test creating an ingredient is successful"""
-        user = create_user()
+        user = make_user()
         ingredient = models.Ingredient.objects.create(
             user=user,
             name='Ingredient1',
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        from recipe import signals
+        from recipe.cache import list_cache_enabled
+
+        if list_cache_enabled():
+            signals.connect_link_receivers()
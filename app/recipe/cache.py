@@ -0,0 +1,43 @@
+"""
+Caching of recipe list responses.
+
+Each user has a version token; cached lists are keyed by it, so changing
+the token invalidates every cached list for that user at once. Caching is
+only on when the `recipe_list` cache alias is configured, because a
+per-process cache cannot be invalidated across workers.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+LIST_CACHE_ALIAS = 'recipe_list'
+LIST_CACHE_TIMEOUT = 300
+
+
+def list_cache_enabled():
+    """Return whether a shared cache is configured for recipe lists."""
+    return LIST_CACHE_ALIAS in settings.CACHES
+
+
+def list_cache():
+    """Return the cache backend holding recipe lists."""
+    return caches[LIST_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'recipe-list-version:{user_id}'
+
+
+def list_cache_key(user_id, query_string):
+    """Return the cache key for a user's recipe list with the given filters."""
+    version = list_cache().get_or_set(_version_key(user_id), uuid.uuid4().hex, None)
+    digest = hashlib.md5(query_string.encode()).hexdigest()
+    return f'recipe-list:{user_id}:{version}:{digest}'
+
+
+def invalidate_list_cache(user_id):
+    """Invalidate every cached recipe list for the user."""
+    if list_cache_enabled():
+        list_cache().set(_version_key(user_id), uuid.uuid4().hex, None)
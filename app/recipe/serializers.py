@@ -1,26 +1,39 @@
 """
 Serializers for the Recipe model in the recipe app.
 """
+from django.db.models import Prefetch
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from core.models import (Recipe, Tag, Ingredient)
 
+# Rows per INSERT when bulk creating tags and ingredients.
+BULK_CREATE_BATCH_SIZE = 500
 
-class IngredientSerializer(serializers.ModelSerializer):
-    """Serializer for the Ingredient model."""
+
+class RecipeAttrSerializer(serializers.ModelSerializer):
+    """Base serializer for recipe attributes."""
 
     class Meta:
-        model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id',)
 
+    def to_representation(self, instance):
+        """Build the read-only representation without per-field dispatch."""
+        return {'id': instance.id, 'name': instance.name}
+
+
+class IngredientSerializer(RecipeAttrSerializer):
+    """Serializer for the Ingredient model."""
+
+    class Meta(RecipeAttrSerializer.Meta):
+        model = Ingredient
+
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(RecipeAttrSerializer):
     """Serializer for the Tag model."""
 
-    class Meta:
+    class Meta(RecipeAttrSerializer.Meta):
         model = Tag
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -32,24 +45,42 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'title', 'time_minutes', 'price', 'description', 'link', 'tags', 'ingredients')
         read_only_fields = ('id',)
+        # Concrete columns rendered by the list view; anything else is deferred.
+        fields_lite = ('id', 'title', 'time_minutes', 'price', 'description', 'link')
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Prefetch the nested relations rendered by this serializer."""
+        return queryset.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only('id', 'name')),
+            Prefetch('ingredients', queryset=Ingredient.objects.only('id', 'name')),
+        )
+
+    def _get_or_create_attrs(self, model, attrs_data, user):
+        """Return the user's `model` objects named in `attrs_data`, creating missing ones in bulk."""
+        # The context is shared by every serializer in a request, so repeated
+        # names across nested or many=True saves are only looked up once.
+        cache = self.context.setdefault('_attr_cache', {})
+        names = list(dict.fromkeys(attr_data['name'] for attr_data in attrs_data))
+        missing = [name for name in names if (model, user.id, name) not in cache]
+        if missing:
+            existing = {obj.name: obj for obj in model.objects.filter(user=user, name__in=missing)}
+            created = model.objects.bulk_create(
+                [model(user=user, name=name) for name in missing if name not in existing],
+                batch_size=BULK_CREATE_BATCH_SIZE,
+            )
+            for obj in list(existing.values()) + created:
+                cache[(model, user.id, obj.name)] = obj
+
+        return [cache[(model, user.id, name)] for name in names]
 
-    def _get_or_create_tags(self, tags_data, recipe=None):
+    def _get_or_create_tags(self, tags_data, recipe, user):
         """Get or create tags for the recipe."""
-        for tag_data in tags_data:
-            tag, created = Tag.objects.get_or_create(
-                user=self.context['request'].user,
-                **tag_data
-            )
-            recipe.tags.add(tag)
+        recipe.tags.add(*self._get_or_create_attrs(Tag, tags_data, user))
 
-    def _get_or_create_ingredients(self, ingredients_data, recipe=None):
+    def _get_or_create_ingredients(self, ingredients_data, recipe, user):
         """Get or create ingredients for the recipe."""
-        for ingredient_data in ingredients_data:
-            ingredient, created = Ingredient.objects.get_or_create(
-                user=self.context['request'].user,
-                **ingredient_data
-            )
-            recipe.ingredients.add(ingredient)
+        recipe.ingredients.add(*self._get_or_create_attrs(Ingredient, ingredients_data, user))
 
     def create(self, validated_data):
         """Create a new recipe with associated tags and ingredients."""
@@ -57,27 +88,33 @@ class RecipeSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients', [])
         recipe = Recipe.objects.create(**validated_data)
 
-        self._get_or_create_ingredients(ingredients, recipe)
-        self._get_or_create_tags(tags, recipe)
+        user = self.context['request'].user
+        self._get_or_create_ingredients(ingredients, recipe, user)
+        self._get_or_create_tags(tags, recipe, user)
 
         return recipe
 
     def update(self, instance, validated_data):
         """Update a recipe and its associated tags and ingredients."""
+        user = self.context['request'].user
         tags_data = validated_data.pop('tags', None)
         if tags_data is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags_data, instance)
+            names = {tag_data['name'] for tag_data in tags_data}
+            current = {tag.name: tag for tag in instance.tags.all()}
+            instance.tags.remove(*[tag for name, tag in current.items() if name not in names])
+            self._get_or_create_tags([{'name': name} for name in names - current.keys()], instance, user)
 
         ingredients_data = validated_data.pop('ingredients', None)
         if ingredients_data is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients_data, instance)
+            names = {ingredient_data['name'] for ingredient_data in ingredients_data}
+            current = {ingredient.name: ingredient for ingredient in instance.ingredients.all()}
+            instance.ingredients.remove(*[ingredient for name, ingredient in current.items() if name not in names])
+            self._get_or_create_ingredients([{'name': name} for name in names - current.keys()], instance, user)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
+        instance.save(update_fields=list(validated_data))
         return instance
 
 
@@ -88,6 +125,88 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ('description', 'image')
 
 
+class UserManyRelatedField(serializers.ManyRelatedField):
+    """Many related field that resolves every submitted key in a single query."""
+
+    # Follows ManyRelatedField.to_internal_value as of DRF 3.12, with the
+    # per-item child lookups replaced by one in_bulk().
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        objs = child.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in objs:
+                child.fail('does_not_exist', pk_value=pk)
+
+        return [objs[pk] for pk in dict.fromkeys(pks)]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key related field limited to objects owned by the request user."""
+
+    # Copy of RelatedField.many_init as of DRF 3.12, returning UserManyRelatedField.
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return UserManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.context['request'].user)
+
+
+class RecipeWriteSerializer(RecipeDetailSerializer):
+    """Serializer for writing recipes with tags and ingredients referenced by ID."""
+    tags = UserPrimaryKeyRelatedField(many=True, required=False, queryset=Tag.objects.all())
+    ingredients = UserPrimaryKeyRelatedField(many=True, required=False, queryset=Ingredient.objects.all())
+
+    def create(self, validated_data):
+        """Create a new recipe linked to existing tags and ingredients."""
+        tags = validated_data.pop('tags', [])
+        ingredients = validated_data.pop('ingredients', [])
+        recipe = Recipe.objects.create(**validated_data)
+
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+
+        return recipe
+
+    def update(self, instance, validated_data):
+        """Update a recipe and relink its tags and ingredients."""
+        tags = validated_data.pop('tags', None)
+        if tags is not None:
+            instance.tags.set(tags)
+
+        ingredients = validated_data.pop('ingredients', None)
+        if ingredients is not None:
+            instance.ingredients.set(ingredients)
+
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+    def to_representation(self, instance):
+        """Render the recipe with nested tags and ingredients."""
+        return RecipeDetailSerializer(instance, context=self.context).data
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to recipes."""
     class Meta:
@@ -99,7 +218,11 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         }
 
     def update(self, instance, validated_data):
-        """Update the recipe image."""
-        instance.image = validated_data.get('image', instance.image)
-        instance.save()
+        """Update the recipe image, skipping the write when it is unchanged."""
+        image = validated_data.get('image', instance.image)
+        if image is instance.image or getattr(image, 'name', None) == instance.image.name:
+            return instance
+
+        instance.image = image
+        instance.save(update_fields=['image'])
         return instance
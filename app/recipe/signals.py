@@ -0,0 +1,42 @@
+"""
+Signal handlers for the recipe app.
+"""
+from django.db.models.signals import (m2m_changed, post_delete, post_save)
+from django.dispatch import receiver
+
+from core.models import (Recipe, Tag, Ingredient)
+from recipe.cache import invalidate_list_cache
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_recipe_list(sender, instance, **kwargs):
+    """Drop the owner's cached recipe lists when a listed row changes."""
+    invalidate_list_cache(instance.user_id)
+
+
+def invalidate_recipe_list_on_link(sender, instance, action, **kwargs):
+    """Drop the owner's cached recipe lists when recipe links change."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_list_cache(instance.user_id)
+
+
+# Any m2m_changed listener turns off Django's fast add() path, so these are
+# only connected when list caching is on.
+LINK_THROUGH_MODELS = (Recipe.tags.through, Recipe.ingredients.through)
+
+
+def connect_link_receivers():
+    """Invalidate cached recipe lists on tag and ingredient link changes."""
+    for through in LINK_THROUGH_MODELS:
+        m2m_changed.connect(invalidate_recipe_list_on_link, sender=through)
+
+
+def disconnect_link_receivers():
+    """Stop invalidating cached recipe lists on link changes."""
+    for through in LINK_THROUGH_MODELS:
+        m2m_changed.disconnect(invalidate_recipe_list_on_link, sender=through)
@@ -0,0 +1,104 @@
+"""
+Benchmarks for the recipe list endpoint.
+
+Skipped by the default run; execute them in a single process with
+`pytest -o addopts=--reuse-db recipe/tests/benchmarks --benchmark-only`.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+import pytest
+
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import (Recipe, Tag, Ingredient)
+from core.tests.factories import make_user
+from recipe.cache import invalidate_list_cache
+
+RECIPES_URL = reverse('recipe:recipe-list')
+RECIPE_COUNT = 1000
+ATTR_COUNT = 50
+# The recipe query plus one prefetch each for tags and ingredients.
+LIST_QUERY_COUNT = 3
+
+SeededData = namedtuple('SeededData', ('user', 'tag_ids', 'ingredient_ids'))
+
+
+@pytest.fixture
+def seeded(db):
+    """Create a user owning 1000 recipes, each linked to one of 50 tags and ingredients.
+
+    Returns the user with the IDs of three tags and three ingredients to filter on.
+    """
+    user = make_user()
+    tags = Tag.objects.bulk_create(
+        [Tag(user=user, name=f'Tag {i}') for i in range(ATTR_COUNT)]
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        [Ingredient(user=user, name=f'Ingredient {i}') for i in range(ATTR_COUNT)]
+    )
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=30,
+            price=Decimal('5.00'),
+            description='Benchmark recipe.',
+        )
+        for i in range(RECIPE_COUNT)
+    ])
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tags[i % ATTR_COUNT].id)
+        for i, recipe in enumerate(recipes)
+    ])
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(recipe_id=recipe.id, ingredient_id=ingredients[i % ATTR_COUNT].id)
+        for i, recipe in enumerate(recipes)
+    ])
+    return SeededData(
+        user=user,
+        tag_ids=[tag.id for tag in tags[:3]],
+        ingredient_ids=[ingredient.id for ingredient in ingredients[:3]],
+    )
+
+
+def _bench_list(benchmark, assert_num_queries, user, params):
+    """Benchmark an uncached recipe list request and return its response."""
+    client = APIClient()
+    client.force_authenticate(user)
+
+    # Timings vary between runners; the query count is the deterministic gate.
+    invalidate_list_cache(user.id)
+    with assert_num_queries(LIST_QUERY_COUNT):
+        client.get(RECIPES_URL, params)
+
+    res = benchmark.pedantic(
+        client.get,
+        args=(RECIPES_URL, params),
+        setup=lambda: invalidate_list_cache(user.id),
+        rounds=20,
+        warmup_rounds=1,
+    )
+    assert res.status_code == 200
+
+    return res
+
+
+def test_list_recipes(benchmark, django_assert_num_queries, seeded):
+    """Benchmark listing every recipe for a user."""
+    res = _bench_list(benchmark, django_assert_num_queries, seeded.user, {})
+
+    assert len(res.data) == RECIPE_COUNT
+
+
+def test_list_recipes_filtered_by_tags_and_ingredients(benchmark, django_assert_num_queries, seeded):
+    """Benchmark listing recipes filtered by both tags and ingredients."""
+    params = {
+        'tags': ','.join(map(str, seeded.tag_ids)),
+        'ingredients': ','.join(map(str, seeded.ingredient_ids)),
+    }
+    res = _bench_list(benchmark, django_assert_num_queries, seeded.user, params)
+
+    assert len(res.data) == 3 * RECIPE_COUNT // ATTR_COUNT
@@ -3,31 +3,30 @@ Tests for Ingredient API endpoints.
 """
 from decimal import Decimal
 
-from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import (SimpleTestCase, TestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import (Ingredient, Recipe)
-from recipe.serializers import IngredientSerializer
+from core.models import Ingredient
+from core.tests.factories import make_user
+from recipe.tests.utils import (make_ingredients, make_recipes, link_ingredients)
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+INGREDIENT_DETAIL_FMT = reverse('recipe:ingredient-detail', args=[0]).rsplit('/', 2)[0] + '/{}/'
 
 
 def detail_url(ingredient_id):
     """Create and return an ingredient detail URL."""
-    return reverse('recipe:ingredient-detail', args=[ingredient_id])
+    return INGREDIENT_DETAIL_FMT.format(ingredient_id)
 
 
-def create_user(email='user@example.com', password='password123'):
-    """Create and return a sample user."""
-    return get_user_model().objects.create_user(email=email, password=password)
-
-
-class PublicIngredientApiTests(TestCase):
+class PublicIngredientApiTests(SimpleTestCase):
     """Test the publicly available ingredient API."""
+    databases = set()
 
     def setUp(self):
         self.client = APIClient()
@@ -39,11 +38,15 @@ class PublicIngredientApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
 class PrivateIngredientApiTests(TestCase):
     """Test the authorized user ingredient API."""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
     def setUp(self):
-        self.user = create_user()
         self.client = APIClient()
         self.client.force_authenticate(self.user)
 
@@ -52,16 +55,17 @@ class PrivateIngredientApiTests(TestCase):
         Ingredient.objects.create(user=self.user, name='Salt')
         Ingredient.objects.create(user=self.user, name='Pepper')
 
-        res = self.client.get(INGREDIENTS_URL)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(INGREDIENTS_URL)
 
-        ingredients = Ingredient.objects.all().order_by('-name')
-        serializer = IngredientSerializer(ingredients, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual([ingredient['name'] for ingredient in res.data], ['Salt', 'Pepper'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('"amount"', ctx.captured_queries[0]['sql'])
 
     def test_ingredients_limited_to_user(self):
         """Test that only ingredients for the authenticated user are returned."""
-        user2 = create_user(email='other@example.com', password='testpass123')
+        user2 = make_user(email='other@example.com', password='testpass123')
         Ingredient.objects.create(user=user2, name='Vinegar')
         ingredient = Ingredient.objects.create(user=self.user, name='Turmeric')
 
@@ -96,48 +100,44 @@ class PrivateIngredientApiTests(TestCase):
 
     def test_filter_ingredients_assigned_to_recipes(self):
         """Test listing ingredients assigned to recipes."""
-        ingredient1 = Ingredient.objects.create(user=self.user, name='Garlic')
-        ingredient2 = Ingredient.objects.create(user=self.user, name='Onion')
-        recipe = Recipe.objects.create(
-            user=self.user,
-            title='Garlic Bread',
-            time_minutes=10,
-            price=Decimal('2.50'),
-            description='Delicious garlic bread',
-            link='http://example.com/garlic-bread'
-        )
-        recipe.ingredients.add(ingredient1)
+        ingredient1, ingredient2 = make_ingredients(self.user, 'Garlic', 'Onion')
+        recipe = make_recipes(self.user, {
+            'title': 'Garlic Bread',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+            'description': 'Delicious garlic bread',
+            'link': 'http://example.com/garlic-bread',
+        })[0]
+        link_ingredients((recipe, ingredient1))
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
-        serializer1 = IngredientSerializer(ingredient1)
-        serializer2 = IngredientSerializer(ingredient2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        names = [ingredient['name'] for ingredient in res.data]
+        self.assertIn(ingredient1.name, names)
+        self.assertNotIn(ingredient2.name, names)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
     def test_filter_ingredients_assigned_unique(self):
         """Test filtering ingredients assigned to recipes returns unique items."""
-        ingredient1 = Ingredient.objects.create(user=self.user, name='Basil')
-        ingredient2 = Ingredient.objects.create(user=self.user, name='Parsley')
-        recipe1 = Recipe.objects.create(
-            user=self.user,
-            title='Pasta',
-            time_minutes=15,
-            price=Decimal('3.00'),
-            description='Pasta with basil',
-            link='http://example.com/pasta'
-        )
-        recipe1.ingredients.add(ingredient1)
-        recipe2 = Recipe.objects.create(
-            user=self.user,
-            title='Salad',
-            time_minutes=5,
-            price=Decimal('1.50'),
-            description='Salad with basil and parsley',
-            link='http://example.com/salad'
+        ingredient1, ingredient2 = make_ingredients(self.user, 'Basil', 'Parsley')
+        recipe1, recipe2 = make_recipes(
+            self.user,
+            {
+                'title': 'Pasta',
+                'time_minutes': 15,
+                'price': Decimal('3.00'),
+                'description': 'Pasta with basil',
+                'link': 'http://example.com/pasta',
+            },
+            {
+                'title': 'Salad',
+                'time_minutes': 5,
+                'price': Decimal('1.50'),
+                'description': 'Salad with basil and parsley',
+                'link': 'http://example.com/salad',
+            },
         )
-        recipe2.ingredients.add(ingredient1, ingredient2)
+        link_ingredients((recipe1, ingredient1), (recipe2, ingredient1), (recipe2, ingredient2))
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
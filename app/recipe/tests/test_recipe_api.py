@@ -2,51 +2,62 @@
 Tests for the Recipe API endpoints.
 """
 from decimal import Decimal
-import tempfile
+from io import BytesIO
 import os
 
 from PIL import Image
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import (TestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import (APIClient, APIRequestFactory)
 
 from core.models import (Recipe, Tag, Ingredient)
 
+from recipe import signals
+from recipe.cache import list_cache
+from recipe.tests.utils import (RECIPE_DEFAULTS, make_ingredients, make_recipes)
 from recipe.serializers import (RecipeSerializer,
-                                RecipeDetailSerializer,)
+                                RecipeDetailSerializer,
+                                RecipeImageSerializer,)
 
 RECIPES_URL = reverse('recipe:recipe-list')
+RECIPE_DETAIL_FMT = reverse('recipe:recipe-detail', args=[0]).rsplit('/', 2)[0] + '/{}/'
+RECIPE_UPLOAD_IMAGE_FMT = reverse('recipe:recipe-upload-image', args=[0]).replace('/0/', '/{}/', 1)
 
 
 def image_upload_url(recipe_id):
     """Create and return an image upload URL for a recipe."""
-    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+    return RECIPE_UPLOAD_IMAGE_FMT.format(recipe_id)
 
 
 def detail_url(recipe_id):
     """Create and return a recipe detail URL."""
-    return reverse('recipe:recipe-detail', args=[recipe_id])
+    return RECIPE_DETAIL_FMT.format(recipe_id)
 
 
 def create_recipe(user, **params):
     """Create and return a sample recipe."""
-    defaults = {
-        'title': 'Sample Recipe',
-        'time_minutes': 30,
-        'price': Decimal('5.00'),
-        'description': 'Sample description for the recipe.',
-        'link': 'http://example.com/recipe.pdf',
-    }
-    defaults.update(params)
+    defaults = {**RECIPE_DEFAULTS, **params}
 
     recipe = Recipe.objects.create(user=user, **defaults)
     return recipe
 
 
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+SHARED_CACHES = {
+    **LOCAL_CACHES,
+    'recipe_list': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'recipe-list'},
+}
+
+
 def create_user(**params):
     """Create and return a sample user."""
     return get_user_model().objects.create_user(**params)
@@ -75,10 +86,14 @@ class PrivateRecipeApiTests(TestCase):
 
     def test_retrieve_recipes(self):
         """Test retrieving a list of recipes."""
-        create_recipe(user=self.user)
-        create_recipe(user=self.user, title='Another Recipe')
+        tag = Tag.objects.create(user=self.user, name='Tag1')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        for recipe in make_recipes(self.user, {'title': 'Sample Recipe'}, {'title': 'Another Recipe'}):
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
 
-        res = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
 
         recipes = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
@@ -106,7 +121,8 @@ class PrivateRecipeApiTests(TestCase):
         recipe = create_recipe(user=self.user)
 
         url = detail_url(recipe.id)
-        res = self.client.get(url)
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
 
         serializer = RecipeDetailSerializer(recipe)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -145,6 +161,21 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(recipe.link, original_link)
         self.assertEqual(recipe.user, self.user)
 
+    def test_partial_update_recipe_writes_changed_columns_only(self):
+        """Test partially updating a recipe only writes the submitted columns."""
+        recipe = create_recipe(user=self.user)
+
+        payload = {'title': 'Updated Recipe'}
+        url = detail_url(recipe.id)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"description"', updates[0])
+
     def test_full_update_recipe(self):
         """Test updating a recipe with PUT."""
         recipe = create_recipe(user=self.user)
@@ -206,7 +237,8 @@ class PrivateRecipeApiTests(TestCase):
             'price': Decimal('7.50'),
             'tags': [{'name': 'Tag1'}, {'name': 'Tag2'}],
         }
-        res = self.client.post(RECIPES_URL, payload, format='json')
+        with self.assertNumQueries(6):
+            res = self.client.post(RECIPES_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         recipes = Recipe.objects.filter(user=self.user)
@@ -229,7 +261,8 @@ class PrivateRecipeApiTests(TestCase):
             'link': 'http://example.com/recipe-existing-tags.pdf',
             'tags': [{'name': 'Tag1'}, {'name': 'Tag2'}],
         }
-        res = self.client.post(RECIPES_URL, payload, format='json')
+        with self.assertNumQueries(6):
+            res = self.client.post(RECIPES_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         recipes = Recipe.objects.filter(user=self.user)
@@ -270,6 +303,41 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(tag2, recipe.tags.all())
         self.assertNotIn(tag1, recipe.tags.all())
 
+    def test_update_recipe_keeps_unchanged_tags(self):
+        """Test updating a recipe keeps tags that are still requested."""
+        tag1 = Tag.objects.create(user=self.user, name='Tag1')
+        tag2 = Tag.objects.create(user=self.user, name='Tag2')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag1, tag2)
+
+        payload = {'tags': [{'name': 'Tag1'}, {'name': 'Tag3'}]}
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Tag1', 'Tag3'],
+        )
+        self.assertIn(tag1, recipe.tags.all())
+        self.assertNotIn(tag2, recipe.tags.all())
+        self.assertEqual(Tag.objects.filter(user=self.user, name='Tag1').count(), 1)
+
+    def test_update_recipe_unchanged_tags_skips_writes(self):
+        """Test resubmitting the current tags does not rewrite the relation."""
+        tag1 = Tag.objects.create(user=self.user, name='Tag1')
+        tag2 = Tag.objects.create(user=self.user, name='Tag2')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag1, tag2)
+
+        payload = {'tags': [{'name': 'Tag2'}, {'name': 'Tag1'}]}
+        url = detail_url(recipe.id)
+        with self.assertNumQueries(4):
+            res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(recipe.tags.all()), {tag1, tag2})
+
     def test_clear_recipe_tags(self):
         """Test clearing tags from a recipe."""
         tag1 = Tag.objects.create(user=self.user, name='Tag1')
@@ -282,7 +350,7 @@ class PrivateRecipeApiTests(TestCase):
         res = self.client.patch(url, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(recipe.tags.count(), 0)
+        self.assertFalse(recipe.tags.exists())
 
     def test_create_recipe_with_ingredients(self):
         """Test creating a recipe with ingredients."""
@@ -292,7 +360,8 @@ class PrivateRecipeApiTests(TestCase):
             'price': Decimal('6.00'),
             'ingredients': [{'name': 'Flour'}, {'name': 'Sugar'}],
         }
-        res = self.client.post(RECIPES_URL, payload, format='json')
+        with self.assertNumQueries(6):
+            res = self.client.post(RECIPES_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         recipes = Recipe.objects.filter(user=self.user)
@@ -315,7 +384,8 @@ class PrivateRecipeApiTests(TestCase):
             'link': 'http://example.com/recipe-existing-ingredients.pdf',
             'ingredients': [{'name': 'Flour'}, {'name': 'Sugar'}],
         }
-        res = self.client.post(RECIPES_URL, payload, format='json')
+        with self.assertNumQueries(6):
+            res = self.client.post(RECIPES_URL, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         recipes = Recipe.objects.filter(user=self.user)
@@ -368,19 +438,132 @@ class PrivateRecipeApiTests(TestCase):
         res = self.client.patch(url, payload, format='json')
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(recipe.ingredients.count(), 0)
+        self.assertFalse(recipe.ingredients.exists())
+
+    def test_create_recipe_by_id(self):
+        """Test creating a recipe referencing tags and ingredients by ID."""
+        tag = Tag.objects.create(user=self.user, name='Tag1')
+        ingredient1 = Ingredient.objects.create(user=self.user, name='Flour')
+        ingredient2 = Ingredient.objects.create(user=self.user, name='Sugar')
+        payload = {
+            'title': 'Recipe by ID',
+            'time_minutes': 20,
+            'price': Decimal('4.00'),
+            'tags': [tag.id],
+            'ingredients': [ingredient1.id, ingredient2.id],
+        }
+        res = self.client.post(f'{RECIPES_URL}?by_id=1', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(list(recipe.tags.all()), [tag])
+        self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(res.data['tags'], [{'id': tag.id, 'name': tag.name}])
+
+    def test_create_recipe_unrecognised_by_id_uses_names(self):
+        """Test a by_id value other than 1 or true keeps the name-based payload."""
+        payload = {
+            'title': 'Recipe by name',
+            'time_minutes': 20,
+            'price': Decimal('4.00'),
+            'tags': [{'name': 'Tag1'}],
+        }
+        res = self.client.post(f'{RECIPES_URL}?by_id=yes', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([tag['name'] for tag in res.data['tags']], ['Tag1'])
+
+    def test_create_recipe_by_id_resolves_each_relation_in_one_query(self):
+        """Test referencing several tags and ingredients by ID looks each relation up once."""
+        tags = Tag.objects.bulk_create([Tag(user=self.user, name=f'Tag{i}') for i in range(3)])
+        ingredients = make_ingredients(self.user, 'Flour', 'Sugar', 'Salt')
+        payload = {
+            'title': 'Recipe by ID',
+            'time_minutes': 20,
+            'price': Decimal('4.00'),
+            'tags': [tag.id for tag in tags],
+            'ingredients': [ingredient.id for ingredient in ingredients],
+        }
+        # One lookup and one link insert per relation, the recipe insert, and two reads for the response.
+        with self.assertNumQueries(7):
+            res = self.client.post(f'{RECIPES_URL}?by_id=1', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['tags']), 3)
+        self.assertEqual(len(res.data['ingredients']), 3)
+
+    def test_update_recipe_by_id(self):
+        """Test updating a recipe relinks tags referenced by ID."""
+        tag1 = Tag.objects.create(user=self.user, name='Tag1')
+        tag2 = Tag.objects.create(user=self.user, name='Tag2')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag1)
+
+        payload = {'tags': [tag2.id]}
+        url = f'{detail_url(recipe.id)}?by_id=1'
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(recipe.tags.all()), [tag2])
+
+    def test_create_recipe_by_id_other_users_tag_error(self):
+        """Test referencing another user's tag by ID returns an error."""
+        other_user = create_user(email='user2@example.com', password='newpassword123')
+        tag = Tag.objects.create(user=other_user, name='Tag1')
+        payload = {
+            'title': 'Recipe by ID',
+            'time_minutes': 20,
+            'price': Decimal('4.00'),
+            'tags': [tag.id],
+        }
+        res = self.client.post(f'{RECIPES_URL}?by_id=1', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_create_recipes_reuses_tags_across_items(self):
+        """Test saving many recipes in one request looks each tag up once."""
+        request = APIRequestFactory().post(RECIPES_URL)
+        request.user = self.user
+        payload = [
+            {'title': title, 'time_minutes': 10, 'price': Decimal('2.00'), 'tags': [{'name': 'Shared'}]}
+            for title in ('Recipe 1', 'Recipe 2')
+        ]
+        serializer = RecipeSerializer(data=payload, many=True, context={'request': request})
+        self.assertTrue(serializer.is_valid())
+
+        with self.assertNumQueries(6):
+            recipes = serializer.save(user=self.user)
+
+        tag = Tag.objects.get(user=self.user, name='Shared')
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [tag])
+
+    def test_setup_eager_loading_prefetches_relations(self):
+        """Test serializing an eager loaded queryset uses a fixed number of queries."""
+        for title in ('Recipe 1', 'Recipe 2', 'Recipe 3'):
+            recipe = create_recipe(user=self.user, title=title)
+            recipe.tags.add(Tag.objects.create(user=self.user, name=title))
+            recipe.ingredients.add(Ingredient.objects.create(user=self.user, name=title))
+
+        recipes = RecipeSerializer.setup_eager_loading(Recipe.objects.filter(user=self.user))
+
+        with self.assertNumQueries(3):
+            data = RecipeSerializer(recipes, many=True).data
+        self.assertEqual(len(data), 3)
 
     def test_filter_recipes_by_tags(self):
         """Test filtering recipes by tags."""
-        recipe1 = create_recipe(user=self.user, title='Recipe with Tag1')
-        recipe2 = create_recipe(user=self.user, title='Recipe with Tag2')
+        recipe1, recipe2, recipe3 = make_recipes(
+            self.user, {'title': 'Recipe with Tag1'}, {'title': 'Recipe with Tag2'}, {'title': 'Recipe with Both Tags'}
+        )
         tag1 = Tag.objects.create(user=self.user, name='Tag1')
         tag2 = Tag.objects.create(user=self.user, name='Tag2')
         recipe1.tags.add(tag1)
         recipe2.tags.add(tag2)
-        recipe3 = create_recipe(user=self.user, title='Recipe with Both Tags')
 
-        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
 
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
@@ -391,15 +574,19 @@ class PrivateRecipeApiTests(TestCase):
 
     def test_filter_recipes_by_ingredients(self):
         """Test filtering recipes by ingredients."""
-        recipe1 = create_recipe(user=self.user, title='Recipe with Ingredient1')
-        recipe2 = create_recipe(user=self.user, title='Recipe with Ingredient2')
+        recipe1, recipe2, recipe3 = make_recipes(
+            self.user,
+            {'title': 'Recipe with Ingredient1'},
+            {'title': 'Recipe with Ingredient2'},
+            {'title': 'Recipe with Both Ingredients'},
+        )
         ingredient1 = Ingredient.objects.create(user=self.user, name='Ingredient1')
         ingredient2 = Ingredient.objects.create(user=self.user, name='Ingredient2')
         recipe1.ingredients.add(ingredient1)
         recipe2.ingredients.add(ingredient2)
-        recipe3 = create_recipe(user=self.user, title='Recipe with Both Ingredients')
 
-        res = self.client.get(RECIPES_URL, {'ingredients': f'{ingredient1.id},{ingredient2.id}'})
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL, {'ingredients': f'{ingredient1.id},{ingredient2.id}'})
 
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
@@ -408,10 +595,117 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(serializer2.data, res.data)
         self.assertNotIn(serializer3.data, res.data)
 
+    def test_filter_recipes_duplicate_and_empty_ids(self):
+        """Test filtering tolerates repeated IDs and trailing commas."""
+        recipe1 = create_recipe(user=self.user, title='Recipe with Tag1')
+        create_recipe(user=self.user, title='Recipe without Tags')
+        tag1 = Tag.objects.create(user=self.user, name='Tag1')
+        recipe1.tags.add(tag1)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag1.id},'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([recipe['id'] for recipe in res.data], [recipe1.id])
+
+    def test_filter_recipes_matching_several_ids_listed_once(self):
+        """Test a recipe matching several filter IDs is returned once without DISTINCT."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Tag1')
+        tag2 = Tag.objects.create(user=self.user, name='Tag2')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe.tags.add(tag1, tag2)
+        recipe.ingredients.add(ingredient)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'ingredients': f'{ingredient.id}'}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual([r['id'] for r in res.data], [recipe.id])
+        self.assertNotIn('DISTINCT', ctx.captured_queries[0]['sql'])
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class RecipeListCacheTests(TestCase):
+    """Test caching of the recipe list on a shared cache."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        signals.connect_link_receivers()
+        cls.addClassCleanup(signals.disconnect_link_receivers)
+
+    def setUp(self):
+        list_cache().clear()
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='testpassword123')
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_recipes_not_cached_without_shared_cache(self):
+        """Test the recipe list is not cached on a per-process cache."""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        with override_settings(CACHES=LOCAL_CACHES):
+            with self.assertNumQueries(3):
+                self.client.get(RECIPES_URL)
+
+    def test_retrieve_recipes_served_from_cache(self):
+        """Test repeating a recipe list request does not hit the database."""
+        create_recipe(user=self.user)
+
+        res1 = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(0):
+            res2 = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res2.status_code, status.HTTP_200_OK)
+        self.assertEqual(res2.data, res1.data)
+
+    def test_recipe_list_cache_invalidated_on_update(self):
+        """Test updating a recipe's tags refreshes the cached list."""
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        payload = {'tags': [{'name': 'New Tag'}]}
+        self.client.patch(detail_url(recipe.id), payload, format='json')
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual([tag['name'] for tag in res.data[0]['tags']], ['New Tag'])
+
+    def test_recipe_list_cache_invalidated_on_tag_change(self):
+        """Test renaming a tag outside the recipe API refreshes the cached list."""
+        tag = Tag.objects.create(user=self.user, name='Old Name')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        tag.name = 'New Name'
+        tag.save()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual([t['name'] for t in res.data[0]['tags']], ['New Name'])
+
+    def test_recipe_list_cache_invalidated_on_link_change(self):
+        """Test linking a tag outside the recipe API refreshes the cached list."""
+        tag = Tag.objects.create(user=self.user, name='Tag1')
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        recipe.tags.add(tag)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual([t['name'] for t in res.data[0]['tags']], ['Tag1'])
+
 
 class RecipeImageUploadTests(TestCase):
     """Test image upload functionality for recipes."""
 
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        buf = BytesIO()
+        Image.new('RGB', (100, 100)).save(buf, format='JPEG')
+        cls._JPEG_BYTES = buf.getvalue()
+
     def setUp(self):
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
@@ -428,22 +722,24 @@ class RecipeImageUploadTests(TestCase):
     def test_upload_image_to_recipe(self):
         """Test uploading an image to a recipe."""
         url = image_upload_url(self.recipe.id)
-        with tempfile.NamedTemporaryFile(suffix='.jpg') as temp_file:
-            img = Image.new('RGB', (100, 100))
-            img.save(temp_file, format='JPEG')
-            temp_file.seek(0)
-
-            res = self.client.post(url, {'image': temp_file}, format='multipart')
+        image = SimpleUploadedFile('image.jpg', self._JPEG_BYTES, content_type='image/jpeg')
+        res = self.client.post(url, {'image': image}, format='multipart')
 
         self.recipe.refresh_from_db()
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_update_unchanged_image_skips_save(self):
+        """Test updating a recipe without a new image does not write the row."""
+        with self.assertNumQueries(0):
+            RecipeImageSerializer().update(self.recipe, {})
+
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image fails."""
         url = image_upload_url(self.recipe.id)
-        res = self.client.post(url, {'image': 'notanimage'}, format='multipart')
+        with self.assertNumQueries(0):
+            res = self.client.post(url, {'image': 'notanimage'}, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertFalse(self.recipe.image)
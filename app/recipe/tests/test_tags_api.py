@@ -15,11 +15,12 @@ from recipe.serializers import TagSerializer
 
 
 TAGS_URL = reverse('recipe:tag-list')
+TAG_DETAIL_FMT = reverse('recipe:tag-detail', args=[0]).rsplit('/', 2)[0] + '/{}/'
 
 
 def details_url(tag_id):
     """Return tag detail URL."""
-    return reverse('recipe:tag-detail', args=[tag_id])
+    return TAG_DETAIL_FMT.format(tag_id)
 
 
 def create_user(email='test@example.com', password='testpass123'):
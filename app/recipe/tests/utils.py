@@ -0,0 +1,36 @@
+"""
+Shared fixture helpers for the recipe API tests.
+"""
+from decimal import Decimal
+
+from core.models import (Ingredient, Recipe)
+
+RECIPE_DEFAULTS = {
+    'title': 'Sample Recipe',
+    'time_minutes': 30,
+    'price': Decimal('5.00'),
+    'description': 'Sample description for the recipe.',
+    'link': 'http://example.com/recipe.pdf',
+}
+
+
+def make_ingredients(user, *names):
+    """Create and return the named ingredients for the user in one query."""
+    return Ingredient.objects.bulk_create(
+        [Ingredient(user=user, name=name) for name in names]
+    )
+
+
+def make_recipes(user, *specs):
+    """Create and return one recipe per field dict, over RECIPE_DEFAULTS, for the user in one query."""
+    return Recipe.objects.bulk_create(
+        [Recipe(user=user, **{**RECIPE_DEFAULTS, **spec}) for spec in specs]
+    )
+
+
+def link_ingredients(*pairs):
+    """Assign ingredients to recipes from (recipe, ingredient) pairs in one query."""
+    through = Recipe.ingredients.through
+    through.objects.bulk_create(
+        [through(recipe_id=recipe.id, ingredient_id=ingredient.id) for recipe, ingredient in pairs]
+    )
@@ -1,6 +1,7 @@
 """
 Views for the recipe app.
 """
+from django.db.models import (Exists, OuterRef, Q)
 from drf_spectacular.utils import (extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes)
 from rest_framework import (viewsets, mixins, status)
 from rest_framework.decorators import action
@@ -11,58 +12,124 @@ from rest_framework.permissions import IsAuthenticated
 
 from core.models import (Recipe, Tag, Ingredient)
 from recipe import serializers
+from recipe.cache import (LIST_CACHE_TIMEOUT, list_cache, list_cache_enabled, list_cache_key,
+                          invalidate_list_cache)
+
+BY_ID_PARAMETER = OpenApiParameter(
+    name='by_id',
+    type=OpenApiTypes.INT, enum=[0, 1],
+    description='Reference existing tags and ingredients by ID instead of by name.'
+)
+RECIPE_LIST_PARAMETERS = [
+    OpenApiParameter(
+        name='tags',
+        type=OpenApiTypes.STR,
+        description='Comma-separated list of tag IDs to filter recipes.'
+    ),
+    OpenApiParameter(
+        name='ingredients',
+        type=OpenApiTypes.STR,
+        description='Comma-separated list of ingredient IDs to filter recipes.'
+    ),
+]
+ATTR_LIST_PARAMETERS = [
+    OpenApiParameter(
+        name='assigned_only',
+        type=OpenApiTypes.INT, enum=[0, 1],
+        description='Filter to only show assigned attributes.'
+    ),
+]
+
+
+class CachedListMixin:
+    """Serve list responses from the shared cache until the user's data changes."""
+
+    def list(self, request, *args, **kwargs):
+        if not list_cache_enabled():
+            return super().list(request, *args, **kwargs)
+
+        key = list_cache_key(request.user.id, request.query_params.urlencode())
+        data = list_cache().get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            list_cache().set(key, data, LIST_CACHE_TIMEOUT)
+
+        return Response(data)
+
+    # Nested tag/ingredient links are written after the recipe row is saved,
+    # so invalidate again once the whole write has finished.
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        invalidate_list_cache(request.user.id)
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        invalidate_list_cache(request.user.id)
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        response = super().destroy(request, *args, **kwargs)
+        invalidate_list_cache(request.user.id)
+        return response
 
 
 @extend_schema_view(
-    list=extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name='tags',
-                type=OpenApiTypes.STR,
-                description='Comma-separated list of tag IDs to filter recipes.'
-            ),
-            OpenApiParameter(
-                name='ingredients',
-                type=OpenApiTypes.STR,
-                description='Comma-separated list of ingredient IDs to filter recipes.'
-            ),
-        ]
-    )
+    list=extend_schema(parameters=RECIPE_LIST_PARAMETERS),
+    create=extend_schema(parameters=[BY_ID_PARAMETER]),
+    update=extend_schema(parameters=[BY_ID_PARAMETER]),
+    partial_update=extend_schema(parameters=[BY_ID_PARAMETER]),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedListMixin, viewsets.ModelViewSet):
     """Manage recipes in the database."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    _SERIALIZERS = {
+        'list': serializers.RecipeSerializer,
+        'upload_image': serializers.RecipeImageSerializer,
+    }
+    _BY_ID_ACTIONS = frozenset(('create', 'update', 'partial_update'))
 
     def _params_to_ints(self, qs):
-        """Convert a list of string IDs to a list of integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+        """Convert a comma-separated string of IDs to a set of integers."""
+        return {int(str_id) for str_id in qs.split(',') if str_id}
+
+    def _by_id(self):
+        """Return whether the client references tags and ingredients by ID."""
+        return self.request.query_params.get('by_id') in ('1', 'true')
 
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user."""
         # return self.queryset.filter(user=self.request.user).order_by('-id')
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        user = self.request.user
+        params = self.request.query_params
+        tags = params.get('tags')
+        ingredients = params.get('ingredients')
+        filters = Q()
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            filters &= Q(tags__id__in=self._params_to_ints(tags))
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            filters &= Q(ingredients__id__in=self._params_to_ints(ingredients))
+
+        queryset = self.queryset.filter(user=user).order_by('-id')
+        if filters:
+            # Match through a pk subquery so the outer query has no m2m joins to deduplicate.
+            queryset = queryset.filter(pk__in=Recipe.objects.filter(filters).values('pk'))
+        if self.action == 'list':
+            queryset = queryset.only(*serializers.RecipeSerializer.Meta.fields_lite)
+        if self.action in ('list', 'retrieve'):
+            queryset = serializers.RecipeSerializer.setup_eager_loading(queryset)
 
-        return queryset.filter(user=self.request.user).distinct().order_by('-id')
+        return queryset
 
     def get_serializer_class(self):
         """Return the appropriate serializer class based on action."""
-        if self.action == 'list':
-            return serializers.RecipeSerializer
-        elif self.action == 'upload_image':
-            return serializers.RecipeImageSerializer
+        if self.action in self._BY_ID_ACTIONS and self._by_id():
+            return serializers.RecipeWriteSerializer
 
-        return self.serializer_class
+        return self._SERIALIZERS.get(self.action, self.serializer_class)
 
     def perform_create(self, serializer):
         """Create a new recipe."""
@@ -71,14 +138,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe."""
+        if not request.FILES.get('image'):
+            return Response({'error': 'Image file is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
         recipe = self.get_object()
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            image = request.FILES.get('image')
-            if not image:
-                return Response({'error': 'Image file is required.'}, status=status.HTTP_400_BAD_REQUEST)
-
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -86,31 +152,39 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
 
 @extend_schema_view(
-    list=extend_schema(
-        parameters=[
-            OpenApiParameter(
-                name='assigned_only',
-                type=OpenApiTypes.INT, enum=[0, 1],
-                description='Filter to only show assigned attributes.'
-            ),
-        ]
-    )
+    list=extend_schema(parameters=ATTR_LIST_PARAMETERS)
 )
-class baseRecipeAttrViewSet(mixins.DestroyModelMixin, mixins.UpdateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+class baseRecipeAttrViewSet(mixins.DestroyModelMixin,
+                            mixins.UpdateModelMixin,
+                            mixins.ListModelMixin,
+                            viewsets.GenericViewSet):
     """Base viewset for recipe attributes."""
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
 
+    # Name of the Recipe many-to-many field linking recipes to this attribute.
+    recipe_relation = None
+
+    def _assigned_exists_subquery(self):
+        """Return an EXISTS expression matching attributes assigned to a recipe."""
+        field = Recipe._meta.get_field(self.recipe_relation)
+        through = field.remote_field.through
+        return Exists(through.objects.filter(**{field.m2m_reverse_field_name(): OuterRef('pk')}))
+
     def get_queryset(self):
         """Retrieve the attributes for the authenticated user."""
+        user = self.request.user
+        params = self.request.query_params
         assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
+            int(params.get('assigned_only', 0))
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = self.queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(self._assigned_exists_subquery())
+        if self.action == 'list':
+            queryset = queryset.only(*self.get_serializer_class().Meta.fields)
 
-        return queryset.filter(user=self.request.user).distinct().order_by('-name')
+        return queryset.filter(user=user).order_by('-name')
 
     def perform_create(self, serializer):
         """Create a new attribute."""
@@ -121,9 +195,11 @@ class TagViewSet(baseRecipeAttrViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    recipe_relation = 'tags'
 
 
 class IngredientViewSet(baseRecipeAttrViewSet):
     """Manage ingredients in the database."""
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+    recipe_relation = 'ingredients'